@@ -1,89 +1,114 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.font_manager as fm
+import altair as alt
+import charset_normalizer
+import pyarrow as pa
+import pyarrow.parquet as pq
+import json
 import os
+import io
 
 # -----------------------------------------------------------
 # 1. 기본 설정
 # -----------------------------------------------------------
 st.set_page_config(page_title="자유무역지역 현황", layout="wide")
-sns.set_style("white")
-plt.rcParams['figure.dpi'] = 150
-plt.rcParams['axes.unicode_minus'] = False
-
-font_path = 'NanumGothic.ttf'
-if os.path.exists(font_path):
-    fm.fontManager.addfont(font_path)
-    font_name = fm.FontProperties(fname=font_path).get_name()
-    plt.rc('font', family=font_name)
-else:
-    if os.name == 'nt': plt.rc('font', family='Malgun Gothic')
-    elif os.name == 'posix': plt.rc('font', family='AppleGothic')
-    else: plt.rc('font', family='NanumGothic')
+
+# 지역/항목 순서와 컬럼명 표 (rerun마다 다시 만들지 않도록 모듈 로드 시 한 번만 계산)
+REGIONS = ('마산', '대불', '율촌', '김제', '울산', '군산', '동해')
+MONEY_METRICS = ('수출', '수입', '수지')
+COUNT_METRICS = ('고용', '업체')
+METRICS = MONEY_METRICS + COUNT_METRICS
+EXPECTED_COLS = ('연도',) + tuple(f"{r}_{m}" for r in REGIONS for m in METRICS)
+REGION_COLS = {r: [f"{r}_{m}" for m in METRICS] for r in REGIONS}
+# 지역별 (금액 컬럼, 인원/업체수 컬럼)
+REGION_INDEX = {
+    r: ([f"{r}_{m}" for m in MONEY_METRICS], [f"{r}_{m}" for m in COUNT_METRICS])
+    for r in REGIONS
+}
+
+# Parquet 사본 메타데이터에서 원본 CSV 정보를 담는 키
+SIDECAR_KEY = b'fta_source'
+# read_and_fix_csv의 결과(컬럼 복구, BROKEN_CHARS, dtype 규칙 등)가 바뀌면 올려서 기존 사본을 무효화합니다.
+SIDECAR_VERSION = 2
+
+# 인코딩이 깨진 컬럼명에 나타나는 문자들
+BROKEN_CHARS = ('占', '\ufffd', 'ï¿', '占쏙옙')
 
 # -----------------------------------------------------------
 # 2. 데이터 로드 함수 (UI 코드 제거됨)
 # -----------------------------------------------------------
-@st.cache_data
-def load_and_fix_data(file_path):
+def detect_encoding(raw):
+    # UTF-8로 그대로 디코딩되면 UTF-8, 아니면 charset_normalizer로 추정합니다.
+    # (이 CSV처럼 UTF-8 파일은 추정기가 iso8859 계열로 오판하는 경우가 있어 먼저 확인합니다)
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    best = charset_normalizer.from_bytes(raw).best()
+    return best.encoding if best else 'cp949'
+
+def unique_columns(columns):
+    # pyarrow 엔진은 중복된 컬럼명을 그대로 두므로 C 엔진처럼 '.1', '.2'를 붙여 구분합니다.
+    seen = set()
+    result = []
+    for name in columns:
+        candidate, n = name, 0
+        while candidate in seen:
+            n += 1
+            candidate = f"{name}.{n}"
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+def read_and_fix_csv(file_path):
     df = None
-    
-    # 1. UTF-8 시도
+
+    # 파일은 한 번만 읽고, 인코딩을 판별한 뒤 한 번만 파싱합니다.
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    encoding = detect_encoding(raw)
+
+    # 1. pyarrow 엔진으로 읽기
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
-    except:
-        # 2. CP949 시도
-        try:
-            df = pd.read_csv(file_path, encoding='cp949')
-        except:
-            pass
+        df = pd.read_csv(io.BytesIO(raw), encoding=encoding, engine='pyarrow')
+    except Exception:
+        pass
 
-    # 3. 에러 무시하고 읽기
+    # 2. 최후 수단: python 엔진으로 에러 무시하고 읽기
     if df is None:
         try:
-            df = pd.read_csv(file_path, encoding='utf-8', encoding_errors='ignore')
-        except:
-            df = pd.read_csv(file_path, encoding='cp949', encoding_errors='ignore')
+            df = pd.read_csv(io.BytesIO(raw), encoding=encoding, encoding_errors='ignore',
+                             engine='python', on_bad_lines='skip')
+        except Exception:
+            pass
 
     if df is None:
         raise ValueError("파일을 도저히 읽을 수 없습니다.")
 
     # --- 컬럼 복구 로직 ---
     
-    df.columns = df.columns.astype(str).str.replace(' ', '').str.strip()
+    df.columns = unique_columns(df.columns.astype(str).str.replace(' ', '').str.strip())
 
-    # 연도 컬럼 찾기
-    year_col_name = None
-    for col in df.columns:
-        try:
-            temp = pd.to_numeric(df[col], errors='coerce')
-            if temp.between(1970, 2030).any():
-                year_col_name = col
-                break
-        except:
-            continue
-            
-    if year_col_name:
-        df = df.rename(columns={year_col_name: '연도'})
-    else:
-        df = df.rename(columns={df.columns[0]: '연도'})
+    # 연도 컬럼 찾기 (컬럼 전체 대신 첫 행만 숫자로 변환해 검사)
+    year_idx = 0
+    if len(df) > 0:
+        first_row = pd.to_numeric(df.iloc[0], errors='coerce')
+        year_hits = first_row.between(1970, 2030).to_numpy()
+        if year_hits.any():
+            year_idx = int(year_hits.argmax())
+
+    columns = list(df.columns)
+    columns[year_idx] = '연도'
+    df.columns = columns
 
     # 깨짐 여부 확인
-    current_headers = "".join(df.columns)
-    is_broken = "占" in current_headers or "ï" in current_headers or "" in current_headers
+    is_broken = any(any(ch in c for ch in BROKEN_CHARS) for c in df.columns)
 
     if is_broken:
         # 데이터 구조 재구축
-        regions_order = ['마산', '대불', '율촌', '김제', '울산', '군산', '동해']
-        metrics_order = ['수출', '수입', '수지', '고용', '업체']
-        
-        new_columns = ['연도']
-        for region in regions_order:
-            for metric in metrics_order:
-                new_columns.append(f"{region}_{metric}")
-        
+        new_columns = list(EXPECTED_COLS)
+
         if len(df.columns) == len(new_columns):
             df.columns = new_columns
         else:
@@ -91,14 +116,134 @@ def load_and_fix_data(file_path):
             df.columns = new_columns[:limit] + list(df.columns[limit:])
 
     # 숫자 데이터 정리
-    df['연도'] = pd.to_numeric(df['연도'], errors='coerce').fillna(0).astype(int)
-    df = df[df['연도'] > 0]
+    df['연도'] = pd.to_numeric(df['연도'], errors='coerce').fillna(0).astype('int16')
+    df = df[df['연도'] > 0].sort_values('연도')
+
+    # 메모리 절약을 위해 8바이트 기본 타입을 4바이트로 줄입니다.
+    # (고용/업체는 빈 값이 있어도 정수로 보이도록 nullable 'Int32'를 씁니다)
+    # (이름이 겹치는 컬럼이 있어도 동작하도록 이름 대신 위치로 접근합니다)
+    for i, col in enumerate(df.columns):
+        if col == '연도':
+            continue
+        values = pd.to_numeric(df.iloc[:, i], errors='coerce')
+        if '고용' in col or '업체' in col:
+            df.isetitem(i, values.astype('Int32'))
+        else:
+            df.isetitem(i, values.astype('float32'))
     
     # [수정됨] 여기서 st.toast를 하지 않고, 복구 여부(is_broken)를 리턴합니다.
     return df, is_broken
 
+def write_sidecar(parquet_path, df, mtime, file_size, is_broken):
+    # 어떤 CSV에서 만들었는지(mtime, 크기)와 컬럼 복구 여부를 Parquet 메타데이터에 함께 저장합니다.
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SIDECAR_KEY] = json.dumps({'version': SIDECAR_VERSION, 'mtime': mtime, 'size': file_size,
+                                        'is_broken': is_broken}).encode()
+    pq.write_table(table.replace_schema_metadata(metadata), parquet_path, compression='zstd')
+
+def read_sidecar_info(parquet_path, mtime, file_size):
+    # 사본의 원본 정보가 현재 CSV, 현재 로더 버전과 정확히 일치할 때만 메타데이터를 돌려줍니다. (아니면 None)
+    if not os.path.exists(parquet_path):
+        return None
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+        info = json.loads(metadata[SIDECAR_KEY])
+    except Exception:
+        return None
+    if info.get('version') != SIDECAR_VERSION:
+        return None
+    if info.get('mtime') != mtime or info.get('size') != file_size:
+        return None
+    return info
+
+def region_columns(columns, region):
+    # 복구된 컬럼명이면 미리 만든 표를 쓰고, 아니면 이름 일부로 찾습니다.
+    if all(c in columns for c in REGION_COLS[region]):
+        return ['연도'] + REGION_COLS[region]
+    return ['연도'] + [c for c in columns if region in c and any(m in c for m in METRICS)]
+
+@st.cache_data
+def prepare_data(file_path, mtime, file_size):
+    # mtime/file_size는 캐시 키 용도입니다. CSV가 수정되면 캐시가 새로 만들어집니다.
+    # 전체 데이터는 캐시에 두지 않고 Parquet 사본만 준비한 뒤, 복구 여부와 컬럼 목록만 돌려줍니다.
+    parquet_path = file_path + '.parquet'
+
+    # 현재 CSV로 만든 Parquet 사본이 있으면 인코딩/컬럼 복구 과정 없이 바로 씁니다.
+    info = read_sidecar_info(parquet_path, mtime, file_size)
+    if info is not None:
+        try:
+            return info['is_broken'], pq.read_schema(parquet_path).names
+        except Exception:
+            pass
+
+    df, is_broken = read_and_fix_csv(file_path)
+
+    # 다음 실행부터 쓸 Parquet 사본 저장 (쓰기 권한이 없으면 건너뜁니다)
+    try:
+        write_sidecar(parquet_path, df, mtime, file_size, is_broken)
+    except Exception:
+        pass
+
+    return is_broken, df.columns.tolist()
+
+@st.cache_data
+def load_region(file_path, mtime, file_size, region):
+    # 선택한 지역의 컬럼만 읽습니다. (지역별로 따로 캐시됩니다)
+    parquet_path = file_path + '.parquet'
+
+    # Parquet 사본은 컬럼 단위로 저장되어 있어 필요한 컬럼만 읽을 수 있습니다.
+    if read_sidecar_info(parquet_path, mtime, file_size) is not None:
+        try:
+            columns = region_columns(pq.read_schema(parquet_path).names, region)
+            return pd.read_parquet(parquet_path, columns=columns)
+        except Exception:
+            pass
+
+    # 사본을 쓸 수 없으면 CSV를 다시 읽어 필요한 컬럼만 남깁니다.
+    df, _ = read_and_fix_csv(file_path)
+    return df[region_columns(df.columns, region)]
+
+# -----------------------------------------------------------
+# 3. 그래프 생성 함수
+# -----------------------------------------------------------
+def build_chart(region, plot_df, money_metrics, count_metrics):
+    # 서버에서 PNG를 그리지 않고 Vega-Lite 명세와 데이터만 보내 브라우저에서 렌더링합니다.
+    # 차트 객체는 변경 가능한 객체이므로 st.cache_resource로 세션 간에 공유하지 않고
+    # rerun마다 새로 만듭니다. (명세 생성 비용은 거의 없습니다)
+    base = alt.Chart(plot_df).encode(x=alt.X('연도:O', title='연도'))
+    layers = []
+
+    # 1. 막대 그래프 (금액)
+    if money_metrics:
+        bars = base.transform_fold(money_metrics, as_=['항목', '금액']).mark_bar(opacity=0.7).encode(
+            xOffset=alt.XOffset('항목:N', sort=money_metrics),
+            y=alt.Y('금액:Q', title='금액 (천달러)', axis=alt.Axis(titleColor='navy')),
+            color=alt.Color('항목:N', sort=money_metrics,
+                            scale=alt.Scale(scheme='blues', reverse=True), legend=alt.Legend(orient='top-left')),
+            tooltip=['연도:O', '항목:N', alt.Tooltip('금액:Q', format=',')],
+        )
+        layers.append(bars)
+
+    # 2. 선 그래프 (인원 / 업체수)
+    if count_metrics:
+        keys = ['고용' if '고용' in c else '업체' for c in count_metrics]
+        lines = base.transform_fold(count_metrics, as_=['항목', '값']).mark_line(point=True, strokeWidth=3).encode(
+            y=alt.Y('값:Q', title='인원 / 업체수', axis=alt.Axis(titleColor='firebrick')),
+            color=alt.Color('항목:N', sort=count_metrics,
+                            scale=alt.Scale(domain=count_metrics,
+                                            range=['firebrick' if k == '고용' else 'orange' for k in keys]),
+                            legend=alt.Legend(orient='top-right')),
+            tooltip=['연도:O', '항목:N', alt.Tooltip('값:Q', format=',')],
+        )
+        layers.append(lines)
+
+    return (alt.layer(*layers)
+            .resolve_scale(y='independent', color='independent')
+            .properties(title=f"{region} 연도별 주요 실적 추이", height=500))
+
 # -----------------------------------------------------------
-# 3. 메인 로직
+# 4. 메인 로직
 # -----------------------------------------------------------
 st.title("📊 자유무역지역 수출입 및 고용 현황")
 
@@ -110,8 +255,10 @@ try:
     if not os.path.exists(file_path):
         st.error(f"❌ 파일을 찾을 수 없습니다: {file_path}")
     else:
-        # [수정됨] 함수에서 데이터와 복구 여부를 함께 받습니다.
-        df, was_fixed = load_and_fix_data(file_path)
+        # [수정됨] 함수에서 복구 여부와 컬럼 목록을 함께 받습니다.
+        file_stat = os.stat(file_path)
+        mtime, file_size = file_stat.st_mtime, file_stat.st_size
+        was_fixed, all_columns = prepare_data(file_path, mtime, file_size)
 
         # [수정됨] UI 알림은 함수 밖에서 실행합니다. (에러 해결 핵심)
         if was_fixed:
@@ -119,63 +266,43 @@ try:
 
         # --- 사이드바 ---
         st.sidebar.header("🔍 설정")
-        regions = ['마산', '대불', '율촌', '김제', '울산', '군산', '동해']
-        selected_region = st.sidebar.selectbox("지역 선택", regions)
+        selected_region = st.sidebar.selectbox("지역 선택", REGIONS)
+        region_df = load_region(file_path, mtime, file_size, selected_region)
 
-        min_y, max_y = int(df['연도'].min()), int(df['연도'].max())
+        min_y, max_y = int(region_df['연도'].min()), int(region_df['연도'].max())
         year_range = st.sidebar.slider("연도 범위", min_y, max_y, (2010, 2023))
 
         # --- 데이터 필터링 ---
-        money_cols = ['수출', '수입', '수지']
-        count_cols = ['고용', '업체']
-        
-        target_money = [c for c in df.columns if selected_region in c and any(m in c for m in money_cols)]
-        target_count = [c for c in df.columns if selected_region in c and any(c_key in c for c_key in count_cols)]
+        target_money, target_count = REGION_INDEX[selected_region]
+
+        # 컬럼명이 복구되지 않은 파일이면 이름 일부로 다시 찾습니다.
+        if not set(target_money + target_count) <= set(region_df.columns):
+            target_money = [c for c in region_df.columns if selected_region in c and any(m in c for m in MONEY_METRICS)]
+            target_count = [c for c in region_df.columns if selected_region in c and any(c_key in c for c_key in COUNT_METRICS)]
+
+        # 컬럼 선택과 이름 변경('마산_수출' → '수출')을 한 번에 처리합니다.
+        target_cols = target_money + target_count
+        metric_names = {c: c.replace(f"{selected_region}_", "") for c in target_cols}
+        money_metrics = [metric_names[c] for c in target_money]
+        count_metrics = [metric_names[c] for c in target_count]
 
-        mask = (df['연도'] >= year_range[0]) & (df['연도'] <= year_range[1])
-        plot_df = df.loc[mask].sort_values('연도')
+        # 정렬은 로드할 때 한 번만 하므로 여기서는 잘라내기만 합니다.
+        mask = region_df['연도'].between(*year_range)
+        plot_df = region_df.loc[mask, ['연도'] + target_cols].rename(columns=metric_names)
 
         # --- 시각화 ---
         st.subheader(f"✨ {selected_region} 지역 상세 분석")
 
         if not target_money and not target_count:
             st.warning("데이터 매칭 실패. 컬럼 이름을 확인해주세요.")
-            st.write(df.columns.tolist())
+            st.write(all_columns)
         else:
-            fig, ax1 = plt.subplots(figsize=(14, 8))
-
-            # 1. 막대 그래프
-            if target_money:
-                melted = plot_df.melt(id_vars='연도', value_vars=target_money, var_name='항목', value_name='금액')
-                melted['항목'] = melted['항목'].str.replace(f"{selected_region}_", "")
-                sns.barplot(data=melted, x='연도', y='금액', hue='항목', ax=ax1, palette='Blues_d', alpha=0.7)
-                ax1.legend(loc='upper left', ncol=3, frameon=False)
-            
-            ax1.set_ylabel("금액 (천달러)", fontsize=12, fontweight='bold', color='navy')
-            ax1.grid(axis='y', linestyle='--', alpha=0.5)
-
-            # 2. 선 그래프
-            ax2 = ax1.twinx()
-            colors = {'고용': 'firebrick', '업체': 'orange'}
-            markers = {'고용': 'o', '업체': 's'}
-
-            for col in target_count:
-                key = '고용' if '고용' in col else '업체'
-                sns.lineplot(x=ax1.get_xticks(), y=plot_df[col], ax=ax2, 
-                             marker=markers.get(key, 'o'), 
-                             color=colors.get(key, 'black'), 
-                             linewidth=3, label=key)
-
-            ax2.set_ylabel("")
-            ax2.text(1.0, -0.08, "인원 / 업체수", transform=ax2.transAxes, 
-                     ha="right", va="top", fontsize=11, fontweight='bold', color='firebrick')
-            ax2.legend(loc='upper right', ncol=2, frameon=False)
-            
-            plt.title(f"{selected_region} 연도별 주요 실적 추이", fontsize=20, fontweight='bold', y=1.05)
-            st.pyplot(fig)
+            chart = build_chart(selected_region, plot_df, money_metrics, count_metrics)
+            st.altair_chart(chart, width='stretch')
 
             with st.expander("데이터 상세 보기"):
-                st.dataframe(plot_df[['연도'] + target_money + target_count])
+                st.dataframe(plot_df.sort_values('연도', ascending=False), width='stretch', hide_index=True,
+                             column_config={'연도': st.column_config.NumberColumn(format="%d")})
 
 except Exception as e:
     st.error(f"❌ 오류 발생: {e}")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_NAME = "산업통상부_자유무역지역 수출입실적 현황_20231231.csv"
+
+
+def make_app(tmp_path, transform=None):
+    # 임시 폴더에 앱과 CSV를 복사해 저장소의 Parquet 사본을 건드리지 않게 합니다.
+    shutil.copy(os.path.join(APP_DIR, "app.py"), tmp_path)
+    raw = open(os.path.join(APP_DIR, CSV_NAME), "rb").read()
+    if transform:
+        raw = transform(raw)
+    (tmp_path / CSV_NAME).write_bytes(raw)
+    return AppTest.from_file(str(tmp_path / "app.py"), default_timeout=60)
+
+
+def add_extra_columns(raw):
+    # 깨진 헤더는 그대로 두고 EXPECTED_COLS보다 많은 컬럼을 붙입니다.
+    header, *rows = raw.split(b"\n")
+    header += ",\ufffd\ufffd,\ufffd\ufffd".encode()
+    rows = [row + b",1,2" if row else row for row in rows]
+    return b"\n".join([header] + rows)
+
+
+def test_broken_header_with_extra_columns(tmp_path):
+    at = make_app(tmp_path, add_extra_columns).run()
+    assert not at.exception
+    assert not at.error
+    assert at.dataframe[0].value.shape == (14, 6)
+
+
+def test_sidecar_warm_start_matches_cold_start(tmp_path):
+    at = make_app(tmp_path).run()
+    cold = at.dataframe[0].value
+    assert (tmp_path / (CSV_NAME + ".parquet")).exists()
+
+    # 메모리 캐시를 비워 Parquet 사본에서 읽는 경로를 타게 합니다.
+    st.cache_data.clear()
+    at = AppTest.from_file(str(tmp_path / "app.py"), default_timeout=60).run()
+    warm = at.dataframe[0].value
+    assert cold.equals(warm)
+    assert [t.value for t in at.toast]
+
+
+def test_sidecar_from_other_loader_version_is_rebuilt(tmp_path):
+    make_app(tmp_path).run()
+    parquet_path = tmp_path / (CSV_NAME + ".parquet")
+
+    # 이전 버전 로더가 만든 사본처럼 버전만 바꾸고 값은 망가뜨립니다.
+    table = pq.read_table(parquet_path)
+    metadata = dict(table.schema.metadata)
+    info = json.loads(metadata[b"fta_source"])
+    info["version"] -= 1
+    metadata[b"fta_source"] = json.dumps(info).encode()
+    table = table.set_column(1, table.column_names[1], pa.array([0.0] * len(table), pa.float32()))
+    pq.write_table(table.replace_schema_metadata(metadata), parquet_path)
+
+    st.cache_data.clear()
+    at = AppTest.from_file(str(tmp_path / "app.py"), default_timeout=60).run()
+    df = at.dataframe[0].value
+    assert df.loc[df["연도"] == 2023, "수출"].tolist() == [1056143.0]